@@ -1,8 +1,52 @@
 
-import plotly.graph_objects as go
+# Renders the pipeline flow chart as a hand-built SVG (no browser needed),
+# then converts it to PNG with cairosvg when that package is installed.
+
+WIDTH, HEIGHT = 600, 1000
+MARGIN_TOP, MARGIN_BOTTOM = 70, 20
+X_RANGE = (0, 1)
+Y_RANGE = (0, 14)
+
+LINE_COLOR = "#21808d"
+FILL_COLOR = "#e8f4f5"
+TEXT_COLOR = "#13343b"
+ARROW_COLOR = "#333333"
+BG_COLOR = "#f3f3ee"
+
+
+def px(x, y):
+    """Map data coordinates to SVG pixel coordinates"""
+    sx = (x - X_RANGE[0]) / (X_RANGE[1] - X_RANGE[0]) * WIDTH
+    plot_height = HEIGHT - MARGIN_TOP - MARGIN_BOTTOM
+    sy = MARGIN_TOP + (Y_RANGE[1] - y) / (Y_RANGE[1] - Y_RANGE[0]) * plot_height
+    return round(sx, 1), round(sy, 1)
+
+
+def rect(x0, y0, x1, y1, rx=0):
+    (left, top), (right, bottom) = px(x0, y1), px(x1, y0)
+    return (f'<rect x="{left}" y="{top}" width="{round(right - left, 1)}" '
+            f'height="{round(bottom - top, 1)}" '
+            f'rx="{rx}" fill="{FILL_COLOR}" stroke="{LINE_COLOR}" stroke-width="2"/>')
+
+
+def text(x, y, lines, size=11, color=TEXT_COLOR, weight="normal"):
+    cx, cy = px(x, y)
+    # Vertically centre multi-line labels around the anchor point
+    first_dy = -0.6 * (len(lines) - 1)
+    spans = "".join(
+        f'<tspan x="{cx}" dy="{first_dy if i == 0 else 1.2}em">{line}</tspan>'
+        for i, line in enumerate(lines)
+    )
+    return (f'<text x="{cx}" y="{cy}" font-family="Arial" font-size="{size}" '
+            f'font-weight="{weight}" fill="{color}" text-anchor="middle" '
+            f'dominant-baseline="middle">{spans}</text>')
+
+
+def arrow(x0, y0, x1, y1):
+    (sx0, sy0), (sx1, sy1) = px(x0, y0), px(x1, y1)
+    return (f'<line x1="{sx0}" y1="{sy0}" x2="{sx1}" y2="{sy1}" stroke="{ARROW_COLOR}" '
+            f'stroke-width="2" marker-end="url(#arrowhead)"/>')
 
-# Create figure
-fig = go.Figure()
 
 # Define node positions (x, y)
 positions = {
@@ -21,7 +65,7 @@ positions = {
     'END': (0.5, 1)
 }
 
-# Add rectangles for process nodes
+# Rectangles for process nodes
 processes = [
     ('Load', 'Load 50 Contracts'),
     ('Extract', 'Extract PDF Text'),
@@ -35,34 +79,6 @@ processes = [
     ('Index', 'Build Search Index')
 ]
 
-for node, label in processes:
-    x, y = positions[node]
-    # Rectangle
-    fig.add_shape(type="rect", x0=x-0.25, y0=y-0.3, x1=x+0.25, y1=y+0.3,
-                  line=dict(color="#21808d", width=2), fillcolor="#e8f4f5")
-    fig.add_annotation(x=x, y=y, text=label, showarrow=False, 
-                      font=dict(size=11, color="#13343b"))
-
-# Add rounded rectangles for start/end
-for node in ['START', 'END']:
-    x, y = positions[node]
-    fig.add_shape(type="rect", x0=x-0.2, y0=y-0.25, x1=x+0.2, y1=y+0.25,
-                  line=dict(color="#21808d", width=2), fillcolor="#e8f4f5",
-                  layer='below')
-    fig.add_annotation(x=x, y=y, text=node, showarrow=False,
-                      font=dict(size=12, color="#13343b", family="Arial Black"))
-
-# Add diamond for decision
-x, y = positions['Loop']
-diamond_x = [x, x+0.25, x, x-0.25, x]
-diamond_y = [y+0.3, y, y-0.3, y, y+0.3]
-fig.add_trace(go.Scatter(x=diamond_x, y=diamond_y, fill="toself",
-                        fillcolor="#e8f4f5", line=dict(color="#21808d", width=2),
-                        mode='lines', showlegend=False, hoverinfo='skip'))
-fig.add_annotation(x=x, y=y, text="For Each<br>Contract?", showarrow=False,
-                  font=dict(size=10, color="#13343b"))
-
-# Add arrows
 arrows = [
     ('START', 'Load'),
     ('Load', 'Loop'),
@@ -76,48 +92,67 @@ arrows = [
     ('Index', 'END')
 ]
 
+elements = []
+
+# Rounded rectangles for start/end (drawn first, like a below-layer shape)
+for node in ['START', 'END']:
+    x, y = positions[node]
+    elements.append(rect(x - 0.2, y - 0.25, x + 0.2, y + 0.25, rx=12))
+    elements.append(text(x, y, [node], size=12, weight="bold"))
+
+for node, label in processes:
+    x, y = positions[node]
+    elements.append(rect(x - 0.25, y - 0.3, x + 0.25, y + 0.3))
+    elements.append(text(x, y, [label]))
+
+# Diamond for decision
+x, y = positions['Loop']
+diamond = " ".join(f"{sx},{sy}" for sx, sy in (
+    px(x, y + 0.3), px(x + 0.25, y), px(x, y - 0.3), px(x - 0.25, y)
+))
+elements.append(f'<polygon points="{diamond}" fill="{FILL_COLOR}" '
+                f'stroke="{LINE_COLOR}" stroke-width="2"/>')
+elements.append(text(x, y, ["For Each", "Contract?"], size=10))
+
 for start, end in arrows:
     x0, y0 = positions[start]
     x1, y1 = positions[end]
-    fig.add_annotation(x=x1, y=y1+0.3, ax=x0, ay=y0-0.3,
-                      xref='x', yref='y', axref='x', ayref='y',
-                      showarrow=True, arrowhead=2, arrowsize=1,
-                      arrowwidth=2, arrowcolor="#333333")
+    elements.append(arrow(x0, y0 - 0.3, x1, y1 + 0.3))
 
 # Loop to Extract (Yes)
-fig.add_annotation(x=0.5, y=10.3, ax=0.5, ay=10.7,
-                  xref='x', yref='y', axref='x', ayref='y',
-                  showarrow=True, arrowhead=2, arrowsize=1,
-                  arrowwidth=2, arrowcolor="#333333")
-fig.add_annotation(x=0.35, y=10.5, text="Yes", showarrow=False,
-                  font=dict(size=9, color="#21808d"))
-
-# Save back to Loop (curved)
-fig.add_shape(type="path",
-              path=f"M 0.5,3.7 L 0.8,3.7 L 0.8,11 L 0.75,11",
-              line=dict(color="#333333", width=2))
-fig.add_annotation(x=0.75, y=11, ax=0.75, ay=11,
-                  xref='x', yref='y', axref='x', ayref='y',
-                  showarrow=True, arrowhead=2, arrowsize=1,
-                  arrowwidth=2, arrowcolor="#333333")
+elements.append(arrow(0.5, 10.7, 0.5, 10.3))
+elements.append(text(0.35, 10.5, ["Yes"], size=9, color=LINE_COLOR))
+
+# Save back to Loop
+path = " L ".join(f"{sx},{sy}" for sx, sy in (
+    px(0.5, 3.7), px(0.8, 3.7), px(0.8, 11), px(0.75, 11)
+))
+elements.append(f'<path d="M {path}" fill="none" stroke="{ARROW_COLOR}" '
+                f'stroke-width="2" marker-end="url(#arrowhead)"/>')
 
 # Loop to Export (No)
-fig.add_annotation(x=0.5, y=3.3, ax=0.5, ay=10.7,
-                  xref='x', yref='y', axref='x', ayref='y',
-                  showarrow=True, arrowhead=2, arrowsize=1,
-                  arrowwidth=2, arrowcolor="#333333")
-fig.add_annotation(x=0.35, y=7, text="No", showarrow=False,
-                  font=dict(size=9, color="#21808d"))
-
-# Update layout
-fig.update_xaxes(range=[0, 1], showgrid=False, showticklabels=False, zeroline=False)
-fig.update_yaxes(range=[0, 14], showgrid=False, showticklabels=False, zeroline=False)
-fig.update_layout(
-    title="CUAD Contract Pipeline",
-    plot_bgcolor='#f3f3ee',
-    paper_bgcolor='#f3f3ee'
-)
+elements.append(arrow(0.5, 10.7, 0.5, 3.3))
+elements.append(text(0.35, 7, ["No"], size=9, color=LINE_COLOR))
+
+svg = "\n".join([
+    f'<svg xmlns="http://www.w3.org/2000/svg" width="{WIDTH}" height="{HEIGHT}" '
+    f'viewBox="0 0 {WIDTH} {HEIGHT}">',
+    '<defs><marker id="arrowhead" markerWidth="8" markerHeight="8" refX="7" refY="4" '
+    f'orient="auto"><path d="M0,0 L8,4 L0,8 z" fill="{ARROW_COLOR}"/></marker></defs>',
+    f'<rect width="100%" height="100%" fill="{BG_COLOR}"/>',
+    f'<text x="20" y="40" font-family="Arial" font-size="17" fill="{TEXT_COLOR}">'
+    'CUAD Contract Pipeline</text>',
+    *elements,
+    '</svg>',
+])
 
 # Save the figure
-fig.write_image('cuad_pipeline.png')
-fig.write_image('cuad_pipeline.svg', format='svg')
+with open('cuad_pipeline.svg', 'w', encoding='utf-8') as f:
+    f.write(svg)
+
+try:
+    import cairosvg
+    cairosvg.svg2png(url='cuad_pipeline.svg', write_to='cuad_pipeline.png')
+except (ImportError, OSError):
+    # OSError: cairosvg is installed but the native cairo library is missing
+    print("cairosvg/cairo not available; wrote cuad_pipeline.svg only")
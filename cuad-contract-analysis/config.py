@@ -56,15 +56,33 @@ CHUNK_OVERLAP = 500
 EMBEDDING_MODEL = "sentence-transformers/all-mpnet-base-v2"
 EMBEDDING_DIM = 768
 TOP_K_RESULTS = 5
+FAISS_INDEX_PATH = OUTPUT_DIR / "clauses.faiss"
+EMBEDDING_CACHE_PATH = OUTPUT_DIR / ".embed_cache.npz"
 
-#API retry configuration
-MAX_RETRIES = 3
-RETRY_DELAY = 2  # seconds
+# Concurrency configuration
+MAX_WORKERS = os.cpu_count() or 4  # Processes for PDF text extraction
+MAX_CONNECTIONS = 8  # Concurrent LLM API calls (lowered automatically on HTTP 429)
+REQUESTS_PER_MINUTE = 500  # LLM API call rate cap shared by all contracts
+
+#API retry configuration (exponential backoff with jitter, transient errors only)
+MAX_RETRIES = 5
+RETRY_INITIAL_DELAY = 0.5  # seconds
+RETRY_MAX_DELAY = 30  # seconds
+RETRY_BACKOFF_FACTOR = 2.0
 
 # Output configuration
-OUTPUT_FORMAT = "csv"  # Options: "csv", "json", "both"
+OUTPUT_FORMAT = "csv"  # Options: "csv", "json", "parquet", "both"
 OUTPUT_CSV = OUTPUT_DIR / "results.csv"
 OUTPUT_JSON = OUTPUT_DIR / "results.json"
+OUTPUT_PARQUET = OUTPUT_DIR / "results.parquet"
+OUTPUT_JSONL = OUTPUT_DIR / "results.jsonl"  # Streamed as each contract completes
+
+# Result cache configuration
+CACHE_DIR = OUTPUT_DIR / ".cache"
+CACHE_MAX_ENTRIES = 1000
+LLM_CACHE_DIR = OUTPUT_DIR / ".llm_cache"  # Raw LLM responses, keyed by request
+LLM_CACHE_MAX_ENTRIES = 10000
+LLM_CACHE_TTL = 30 * 24 * 3600  # seconds
 
 
 print("="*80)
@@ -2,9 +2,12 @@
 Main execution script for CUAD Contract Analysis Pipeline
 """
 import argparse
+import asyncio
 import logging
+import os
+from concurrent.futures import Executor, ProcessPoolExecutor
 from pathlib import Path
-from typing import List
+from typing import List, Optional
 import pandas as pd
 import json
 from tqdm import tqdm
@@ -13,7 +16,8 @@ from dotenv import load_dotenv
 import config
 from src.data_loader import load_cuad_contracts
 from src.text_extractor import extract_text_from_pdf
-from src.llm_processor import LLMProcessor
+from src.llm_processor import LLMProcessor, RetryConfig, PROMPT_VERSION
+from src.cache import make_cache_key, get_cached, put_cached
 from src.utils import normalize_text, extract_contract_id, count_words
 
 load_dotenv()
@@ -28,6 +32,21 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+RESULT_COLUMNS = [
+    'contract_id',
+    'summary',
+    'termination_clause',
+    'confidentiality_clause',
+    'liability_clause',
+    'status'
+]
+
+NUMERIC_DTYPES = {
+    'contract_length': 'Int32',
+    'word_count': 'Int32',
+    'summary_word_count': 'Int16',
+}
+
 
 def parse_arguments():
     """Parse command line arguments"""
@@ -72,20 +91,56 @@ def parse_arguments():
         '--output-format',
         type=str,
         default=config.OUTPUT_FORMAT,
-        choices=['csv', 'json', 'both'],
+        choices=['csv', 'json', 'parquet', 'both'],
         help='Output format'
     )
+    parser.add_argument(
+        '--max-workers',
+        type=int,
+        default=config.MAX_WORKERS,
+        help='Number of processes used for PDF text extraction'
+    )
+    parser.add_argument(
+        '--max-connections',
+        type=int,
+        default=config.MAX_CONNECTIONS,
+        help='Maximum number of concurrent LLM API calls'
+    )
+    parser.add_argument(
+        '--requests-per-minute',
+        type=float,
+        default=config.REQUESTS_PER_MINUTE,
+        help='Maximum LLM API calls per minute across all contracts'
+    )
+    parser.add_argument(
+        '--no-cache',
+        action='store_true',
+        help='Ignore cached results and LLM responses and reprocess every contract'
+    )
     
     return parser.parse_args()
 
 
-def process_single_contract(pdf_path: Path, llm_processor: LLMProcessor) -> dict:
+async def process_single_contract_async(pdf_path: Path, llm_processor: LLMProcessor,
+                                        use_cache: bool = True,
+                                        executor: Optional[Executor] = None) -> dict:
     """Process a single contract"""
     logger.info(f"Processing contract: {pdf_path.name}")
 
     try:
+        loop = asyncio.get_running_loop()
+        cache_key = None
+        if use_cache:
+            cache_key = await loop.run_in_executor(
+                None, make_cache_key, pdf_path, llm_processor.model, PROMPT_VERSION
+            )
+            cached = get_cached(cache_key, config.CACHE_DIR)
+            if cached is not None:
+                logger.info(f"  Using cached result for {pdf_path.name}")
+                return cached
+
         logger.info("  Extracting text from PDF...")
-        raw_text = extract_text_from_pdf(pdf_path)
+        raw_text = await loop.run_in_executor(executor, extract_text_from_pdf, pdf_path)
 
         logger.info("  Normalizing text...")
         contract_text = normalize_text(raw_text)
@@ -104,14 +159,22 @@ def process_single_contract(pdf_path: Path, llm_processor: LLMProcessor) -> dict
         logger.info(f"  Extracted {len(contract_text)} characters")
 
         logger.info("  Processing with LLM...")
-        results = llm_processor.process_contract(contract_text)
+        results = await llm_processor.process_contract(contract_text)
 
         results['contract_id'] = extract_contract_id(pdf_path)
-        results['contract_length'] = str(len(contract_text))  # Convert to string
-        results['word_count'] = str(count_words(contract_text))  # Convert to string
-        results['summary_word_count'] = str(count_words(results.get('summary', '')))  # Convert to string
-        results['status'] = 'success'
-
+        results['contract_length'] = len(contract_text)
+        results['word_count'] = count_words(contract_text)
+        results['summary_word_count'] = count_words(results.get('summary', ''))
+        # Incomplete results (some extraction requests failed) are kept out of
+        # the cache so the next run retries them
+        results['status'] = 'partial' if results.pop('partial', False) else 'success'
+
+        if cache_key and results['status'] == 'success':
+            try:
+                await asyncio.to_thread(put_cached, cache_key, results,
+                                        config.CACHE_DIR, config.CACHE_MAX_ENTRIES)
+            except Exception as e:
+                logger.warning(f"  Could not cache result for {pdf_path.name}: {e}")
 
         logger.info(f"  Successfully processed {pdf_path.name}")
         return results
@@ -128,24 +191,46 @@ def process_single_contract(pdf_path: Path, llm_processor: LLMProcessor) -> dict
         }
 
 
+async def process_contracts_async(contract_files: List[Path], llm_processor: LLMProcessor,
+                                  max_workers: int, use_cache: bool = True,
+                                  stream_path: Optional[Path] = None) -> List[dict]:
+    """Process all contracts concurrently, preserving input order in the results.
+
+    Each result is also appended to stream_path as a JSON line as soon as it
+    completes, so partial results survive an interrupted run.
+    """
+    # PDF parsing is CPU-bound pure Python, so it runs in worker processes
+    # to sidestep the GIL while the event loop keeps LLM calls in flight.
+    with ProcessPoolExecutor(max_workers=max(1, max_workers)) as extract_pool, \
+            open(stream_path or os.devnull, 'w', encoding='utf-8') as stream:
+        tasks = [
+            asyncio.ensure_future(
+                process_single_contract_async(pdf_path, llm_processor, use_cache, extract_pool)
+            )
+            for pdf_path in contract_files
+        ]
+        try:
+            for task in tqdm(asyncio.as_completed(tasks), total=len(tasks),
+                             desc="Processing contracts"):
+                result = await task
+                stream.write(json.dumps(result, ensure_ascii=False) + "\n")
+                stream.flush()
+        finally:
+            await llm_processor.aclose()
+
+    return [task.result() for task in tasks]
+
+
 def save_results(results: List[dict], output_format: str):
     """Save results to file(s)"""
     df = pd.DataFrame(results)
+    # Nullable integer dtypes, since failed contracts have no counts
+    df = df.astype({
+        col: dtype for col, dtype in NUMERIC_DTYPES.items() if col in df.columns
+    })
 
-    column_order = [
-        'contract_id',
-        'summary',
-        'termination_clause',
-        'confidentiality_clause',
-        'liability_clause',
-        'status'
-    ]
-
-    for col in df.columns:
-        if col not in column_order:
-            column_order.append(col)
-
-    df = df[column_order]
+    fixed = set(RESULT_COLUMNS)
+    df = df.reindex(columns=RESULT_COLUMNS + [c for c in df.columns if c not in fixed])
 
     if output_format in ['csv', 'both']:
         csv_path = config.OUTPUT_CSV
@@ -158,55 +243,48 @@ def save_results(results: List[dict], output_format: str):
             json.dump(results, f, indent=2, ensure_ascii=False)
         logger.info(f"Results saved to: {json_path}")
 
+    if output_format == 'parquet':
+        parquet_path = config.OUTPUT_PARQUET
+        df.to_parquet(parquet_path, engine='pyarrow', compression='zstd', index=False)
+        logger.info(f"Results saved to: {parquet_path}")
+
 
 def print_summary_statistics(results: List[dict]):
     """Print summary statistics of processing"""
-    total = len(results)
-    successful = sum(1 for r in results if r.get('status') == 'success')
-    failed = total - successful
+    df = pd.DataFrame(results)
+    total = len(df)
+    if total == 0:
+        logger.warning("No contracts were processed")
+        return
+
+    successful = int((df['status'] == 'success').sum())
+    partial = int((df['status'] == 'partial').sum())
+    failed = total - successful - partial
+    success_mask = df['status'].isin(['success', 'partial'])
     
     logger.info("=" * 80)
     logger.info("PROCESSING SUMMARY")
     logger.info("=" * 80)
     logger.info(f"Total contracts processed: {total}")
     logger.info(f"Successful: {successful} ({successful/total*100:.1f}%)")
+    if partial:
+        logger.info(f"Partial (some requests failed, not cached): {partial} ({partial/total*100:.1f}%)")
     logger.info(f"Failed: {failed} ({failed/total*100:.1f}%)")
     
-    if successful > 0:
-        termination_found = sum(
-            1 for r in results 
-            if r.get('termination_clause') not in ['Not found', 'Error', None]
-        )
-        confidentiality_found = sum(
-            1 for r in results 
-            if r.get('confidentiality_clause') not in ['Not found', 'Error', None]
-        )
-        liability_found = sum(
-            1 for r in results 
-            if r.get('liability_clause') not in ['Not found', 'Error', None]
-        )
+    if success_mask.any():
+        clauses = df[['termination_clause', 'confidentiality_clause', 'liability_clause']]
+        found = (clauses.notna() & ~clauses.isin(['Not found', 'Error'])).sum()
+        termination_found = int(found['termination_clause'])
+        confidentiality_found = int(found['confidentiality_clause'])
+        liability_found = int(found['liability_clause'])
         
         logger.info(f"\nClause Extraction Success Rates:")
         logger.info(f"  Termination clauses: {termination_found}/{total} ({termination_found/total*100:.1f}%)")
         logger.info(f"  Confidentiality clauses: {confidentiality_found}/{total} ({confidentiality_found/total*100:.1f}%)")
         logger.info(f"  Liability clauses: {liability_found}/{total} ({liability_found/total*100:.1f}%)")
         
-        # Fix: Convert to int if it's a string
-        summary_lengths = []
-        for r in results:
-            if r.get('status') == 'success':
-                word_count = r.get('summary_word_count', 0)
-                # Convert to int if it's a string
-                if isinstance(word_count, str):
-                    try:
-                        word_count = int(word_count)
-                    except ValueError:
-                        word_count = 0
-                summary_lengths.append(word_count)
-        
-        if summary_lengths:
-            avg_summary_length = sum(summary_lengths) / len(summary_lengths)
-            logger.info(f"\nAverage summary length: {avg_summary_length:.1f} words")
+        avg_summary_length = df.loc[success_mask, 'summary_word_count'].mean()
+        logger.info(f"\nAverage summary length: {avg_summary_length:.1f} words")
     
     logger.info("=" * 80)
 
@@ -221,11 +299,30 @@ def main():
     logger.info(f"LLM Model: {args.model}")
     logger.info(f"Number of contracts: {args.num_contracts}")
     logger.info(f"Output format: {args.output_format}")
+    logger.info(f"Max workers: {args.max_workers}")
+    logger.info(f"Max connections: {args.max_connections}")
+    logger.info(f"Requests per minute: {args.requests_per_minute}")
+    logger.info(f"Result cache: {'Disabled' if args.no_cache else 'Enabled'}")
     logger.info(f"Semantic search: {'Enabled' if args.enable_semantic_search else 'Disabled'}")
     logger.info("=" * 80)
 
     logger.info("Initializing LLM processor...")
-    llm_processor = LLMProcessor(provider=args.provider, model=args.model)
+    llm_processor = LLMProcessor(
+        provider=args.provider,
+        model=args.model,
+        max_connections=args.max_connections,
+        retry_config=RetryConfig(
+            max_retries=config.MAX_RETRIES,
+            initial_delay=config.RETRY_INITIAL_DELAY,
+            max_delay=config.RETRY_MAX_DELAY,
+            backoff_factor=config.RETRY_BACKOFF_FACTOR
+        ),
+        cache_dir=config.LLM_CACHE_DIR,
+        cache_ttl=config.LLM_CACHE_TTL,
+        cache_max_entries=config.LLM_CACHE_MAX_ENTRIES,
+        force_refresh=args.no_cache,
+        requests_per_minute=args.requests_per_minute
+    )
 
     if args.test_mode and args.contract_path:
         logger.info(f"Running in test mode with: {args.contract_path}")
@@ -239,25 +336,30 @@ def main():
 
     logger.info(f"Found {len(contract_files)} contracts to process")
 
-    results = []
-
-    for pdf_path in tqdm(contract_files, desc="Processing contracts"):
-        result = process_single_contract(pdf_path, llm_processor)
-        results.append(result)
+    results = asyncio.run(
+        process_contracts_async(
+            contract_files, llm_processor, args.max_workers,
+            use_cache=not args.no_cache,
+            stream_path=config.OUTPUT_JSONL
+        )
+    )
 
     logger.info("\nSaving results...")
     save_results(results, args.output_format)
 
     print_summary_statistics(results)
+    llm_processor.log_token_usage()
 
     if args.enable_semantic_search and results:
         logger.info("\nBuilding semantic search index...")
         try:
             from src.embeddings import SemanticSearchEngine
 
-            search_engine = SemanticSearchEngine()
+            search_engine = SemanticSearchEngine(cache_path=config.EMBEDDING_CACHE_PATH)
             search_engine.build_index(results)
             logger.info("Semantic search index built successfully!")
+            if search_engine.index is not None:
+                search_engine.save_index(config.FAISS_INDEX_PATH)
 
             query = "termination for breach"
             logger.info(f"\nExample search: '{query}'")
@@ -0,0 +1,102 @@
+"""
+On-disk caches of per-contract results and raw LLM responses keyed by content hash
+"""
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Eviction scans the whole cache directory, so it only runs every few writes;
+# between scans a directory may exceed max_entries by up to 10%
+EVICT_EVERY = 100
+_writes_since_evict: Dict[Path, int] = {}
+# put_cached runs in worker threads; one eviction scan at a time
+_evict_lock = threading.Lock()
+
+
+def make_cache_key(pdf_path: Path, model: str, prompt_version: str) -> str:
+    """Hash the PDF bytes together with the model and prompt version"""
+    digest = hashlib.sha256()
+    with open(pdf_path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    digest.update(model.encode('utf-8'))
+    digest.update(prompt_version.encode('utf-8'))
+    return digest.hexdigest()
+
+
+def make_llm_cache_key(model: str, messages: List[Dict[str, str]],
+                       temperature: float, **params: Any) -> str:
+    """Hash the model, messages and sampling parameters of a chat request"""
+    payload = json.dumps(
+        {"model": model, "messages": messages, "temperature": temperature, **params},
+        sort_keys=True
+    )
+    return hashlib.blake2b(payload.encode('utf-8'), digest_size=32).hexdigest()
+
+
+def get_cached(key: str, cache_dir: Path) -> Optional[Dict[str, Any]]:
+    """Return the cached result for key, or None on a miss"""
+    path = cache_dir / f"{key}.json"
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            value = json.load(f)
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError) as e:
+        logger.debug("Ignoring unreadable cache entry %s: %s", path.name, e)
+        return None
+
+    # Touch the entry so eviction treats mtime as last access time
+    try:
+        os.utime(path)
+    except OSError:
+        pass
+    return value
+
+
+def put_cached(key: str, value: Dict[str, Any], cache_dir: Path,
+               max_entries: int = 1000) -> None:
+    """Atomically store value under key, periodically evicting least recently used entries"""
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=cache_dir, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(value, f, ensure_ascii=False)
+        os.replace(tmp_path, cache_dir / f"{key}.json")
+    except Exception:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+    with _evict_lock:
+        writes = _writes_since_evict.get(cache_dir, 0) + 1
+        if writes >= max(1, min(EVICT_EVERY, max_entries // 10)):
+            _evict(cache_dir, max_entries)
+            writes = 0
+        _writes_since_evict[cache_dir] = writes
+
+
+def _evict(cache_dir: Path, max_entries: int) -> None:
+    """Remove the oldest entries (by mtime) beyond max_entries"""
+    entries = []
+    for path in cache_dir.glob("*.json"):
+        try:
+            entries.append((path.stat().st_mtime, path))
+        except OSError:
+            pass  # removed since the glob
+    if len(entries) <= max_entries:
+        return
+
+    entries.sort()
+    for _, path in entries[:len(entries) - max_entries]:
+        try:
+            path.unlink()
+        except OSError:
+            pass
@@ -1,12 +1,26 @@
 """
 Data loading and management for CUAD dataset
 """
+import heapq
 import logging
 from pathlib import Path
-from typing import List
+from typing import List, Optional
 
 logger = logging.getLogger(__name__)
 
+# Remembers which candidate directory held the PDFs on the last successful load
+PDF_DIR_MARKER = ".cuad_pdf_dir"
+
+
+def _read_cached_pdf_dir(marker: Path) -> Optional[Path]:
+    """Return the directory recorded by a previous load, if it still exists"""
+    try:
+        directory = Path(marker.read_text(encoding='utf-8').strip())
+    except OSError:
+        return None
+    return directory if directory.is_dir() else None
+
+
 def load_cuad_contracts(data_dir: Path, num_contracts: int = 50) -> List[Path]:
     """
     Load contract PDF files from CUAD dataset
@@ -18,7 +32,8 @@ def load_cuad_contracts(data_dir: Path, num_contracts: int = 50) -> List[Path]:
     Returns:
         List of paths to PDF files
     """
-    pdf_files = []
+    pdf_files: List[Path] = []
+    marker = data_dir / PDF_DIR_MARKER
 
     possible_dirs = [
         data_dir,
@@ -27,11 +42,21 @@ def load_cuad_contracts(data_dir: Path, num_contracts: int = 50) -> List[Path]:
         data_dir / "CUAD_v1" / "full_contract_pdf"
     ]
 
+    cached_dir = _read_cached_pdf_dir(marker)
+    if cached_dir is not None:
+        possible_dirs.insert(0, cached_dir)
+
     for directory in possible_dirs:
         if directory.exists():
-            pdfs = list(directory.glob("*.pdf"))
+            # Partial sort: only the first num_contracts names are needed
+            pdfs = heapq.nsmallest(num_contracts, directory.glob("*.pdf"))
             if pdfs:
-                pdf_files.extend(pdfs)
+                pdf_files = pdfs
+                if directory != cached_dir:
+                    try:
+                        marker.write_text(str(directory), encoding='utf-8')
+                    except OSError as e:
+                        logger.debug("Could not record PDF directory: %s", e)
                 break
 
     if not pdf_files:
@@ -40,6 +65,5 @@ def load_cuad_contracts(data_dir: Path, num_contracts: int = 50) -> List[Path]:
         logger.info("Download from: https://zenodo.org/record/4595826")
         return []
 
-    pdf_files = sorted(pdf_files)[:num_contracts]
     logger.info(f"Loaded {len(pdf_files)} contract files")
     return pdf_files
@@ -2,19 +2,238 @@
 LLM-based contract analysis and clause extraction - IMPROVED VERSION
 Implements chunking, keyword filtering, and enhanced prompt engineering
 """
+import asyncio
+import functools
+import heapq
+import json
 import os
-from typing import Dict, List, Any, Tuple
+import random
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Dict, Iterable, Iterator, List, Any, Optional, Tuple
 from dotenv import load_dotenv
 import logging
 import re
-from tenacity import retry, stop_after_attempt, wait_exponential
+
+from .cache import make_llm_cache_key, get_cached, put_cached
 
 load_dotenv()
 logger = logging.getLogger(__name__)
 
+try:
+    import h2  # noqa: F401  # enables HTTP/2 in httpx
+    HAS_HTTP2 = True
+except ImportError:
+    HAS_HTTP2 = False
+
+try:
+    import ahocorasick
+    HAS_AHOCORASICK = True
+except ImportError:
+    HAS_AHOCORASICK = False
+
+try:
+    import tiktoken
+    HAS_TIKTOKEN = True
+except ImportError:
+    HAS_TIKTOKEN = False
+
+try:
+    import numpy as np
+    from rapidfuzz import fuzz, process as fuzz_process
+    HAS_RAPIDFUZZ = True
+except ImportError:
+    HAS_RAPIDFUZZ = False
+
+# Bump whenever prompts, response parsing or the result format change so
+# cached results are invalidated
+PROMPT_VERSION = "14"
+
+# Contracts up to this many characters are analysed with a single combined call
+COMBINED_MAX_CHARS = 60000
+
+CLAUSE_FIELDS = {
+    "termination": "termination_clause",
+    "confidentiality": "confidentiality_clause",
+    "liability": "liability_clause",
+}
+
+# One-line descriptions used by the multi-clause JSON prompts
+CLAUSE_DESCRIPTIONS = {
+    "termination": "conditions and notice periods for terminating the agreement, automatic termination, effects of termination and surviving obligations",
+    "confidentiality": "confidential information definitions, non-disclosure obligations, permitted uses, duration and exceptions",
+    "liability": "limitations of liability, damage caps and exclusions, indemnification obligations and warranty disclaimers",
+}
+
+# Prompt pieces for per-clause extraction, built once so every request for a
+# clause type sends byte-identical text (stable prefix and response cache keys)
+_SYSTEM_PROMPT = """You are a legal AI assistant specialized in contract analysis and clause extraction.
+
+Your task is to identify and extract specific types of clauses from legal contracts with high accuracy.
+
+CRITICAL INSTRUCTIONS:
+- Extract ONLY the relevant clause text, maintaining exact wording from the contract
+- If multiple instances of the clause exist, extract ALL of them as separate list items
+- Extract complete clauses - don't cut off mid-sentence
+- If the clause spans multiple paragraphs, include all relevant paragraphs
+- If the clause is definitely not present in the provided text, return an empty list
+- Be thorough but precise - include all relevant text but exclude unrelated content
+- Look for the substance of the clause, not just section headers
+- Respond with a single JSON object and nothing else"""
+
+_SUMMARY_SYSTEM_PROMPT = """You are a legal expert specializing in contract analysis.
+Your task is to generate concise, accurate summaries of legal contracts.
+Focus on extracting the most important information."""
+
+# Single-call prompts: every clause type and the summary over the whole
+# contract, or every clause type over their relevant sections
+_COMBINED_SYSTEM_PROMPT = """You are a legal AI assistant specialized in contract analysis and clause extraction.
+
+Your task is to extract specific clauses from a legal contract and summarize it.
+
+CRITICAL INSTRUCTIONS:
+- Extract clause text verbatim, maintaining exact wording from the contract
+- If multiple instances of a clause exist, include ALL of them as separate list items
+- Extract complete clauses - don't cut off mid-sentence
+- Use an empty list when a clause is definitely not present in the contract
+- Respond with a single JSON object and nothing else"""
+
+_ALL_CLAUSES_SYSTEM_PROMPT = """You are a legal AI assistant specialized in contract analysis and clause extraction.
+
+Your task is to identify and extract specific types of clauses from legal contracts with high accuracy.
+
+CRITICAL INSTRUCTIONS:
+- Extract clause text verbatim, maintaining exact wording from the contract
+- Extract complete clauses - don't cut off mid-sentence
+- Use an empty list when a clause type is not present in the provided text
+- Respond with a single JSON object and nothing else"""
+
+_CLAUSE_QUESTIONS = {
+    "termination": """Question: What are the termination provisions in this contract?
+
+Description: Look for clauses that specify:
+- Conditions under which the agreement can be terminated (termination for cause, convenience, etc.)
+- Notice periods required for termination
+- Rights of either party to terminate
+- Automatic termination conditions
+- Effects of termination
+- Survival of obligations after termination""",
+    
+    "confidentiality": """Question: What are the confidentiality and non-disclosure obligations?
+
+Description: Look for clauses that specify:
+- What information is considered confidential or proprietary
+- Obligations to protect confidential information
+- Restrictions on disclosure to third parties
+- Permitted uses of confidential information
+- Duration of confidentiality obligations
+- Exceptions to confidentiality (e.g., publicly available information)
+- Return or destruction of confidential information""",
+    
+    "liability": """Question: What are the liability, limitation of liability, and indemnification provisions?
+
+Description: Look for clauses that specify:
+- Limitations on liability (caps on damages, excluded types of damages)
+- Indemnification obligations (who indemnifies whom and for what)
+- Disclaimers of warranties
+- Allocation of risk between parties
+- Liability for breach of specific obligations
+- Exclusions of consequential or indirect damages
+- Maximum liability amounts"""
+}
+
+# Answer prefixes the model sometimes echoes before the clause text
+_PREFIX_RE = re.compile(
+    r'^(?:(?:Extracted\s+(?:Termination\s+|Confidentiality\s+|Liability\s+)?Clause(?:\(s\))?'
+    r'|The clause is|Answer|Clause):\s*)+',
+    re.IGNORECASE
+)
+
+# Few-shot examples with realistic contract language
+_FEW_SHOT = {
+    "termination": """Here are examples of termination clause extraction:
+
+Example 1:
+Contract Text: "Either Party may terminate this Agreement at any time, with or without cause, upon thirty (30) days prior written notice to the other Party. Upon termination for any reason, all rights and obligations of the Parties shall cease, except for those obligations that by their nature are intended to survive termination, including but not limited to confidentiality obligations, payment obligations, and indemnification obligations."
+
+Output: {"clauses": ["Either Party may terminate this Agreement at any time, with or without cause, upon thirty (30) days prior written notice to the other Party. Upon termination for any reason, all rights and obligations of the Parties shall cease, except for those obligations that by their nature are intended to survive termination, including but not limited to confidentiality obligations, payment obligations, and indemnification obligations."]}
+
+Example 2:
+Contract Text: "This Agreement shall automatically terminate upon the occurrence of any of the following events: (a) the bankruptcy or insolvency of either party; (b) a material breach by either party that remains uncured for thirty (30) days after written notice of such breach; or (c) the mutual written agreement of both parties to terminate."
+
+Output: {"clauses": ["This Agreement shall automatically terminate upon the occurrence of any of the following events: (a) the bankruptcy or insolvency of either party; (b) a material breach by either party that remains uncured for thirty (30) days after written notice of such breach; or (c) the mutual written agreement of both parties to terminate."]}
+
+""",
+
+    "confidentiality": """Here are examples of confidentiality clause extraction:
+
+Example 1:
+Contract Text: "The Receiving Party agrees to hold and maintain the Confidential Information in strict confidence and to take all reasonable precautions to protect such Confidential Information. The Receiving Party shall not, without the prior written approval of the Disclosing Party, disclose any Confidential Information to any third parties, except to those employees, contractors, and advisors who need to know such information and who have been advised of the confidential nature of such information."
+
+Output: {"clauses": ["The Receiving Party agrees to hold and maintain the Confidential Information in strict confidence and to take all reasonable precautions to protect such Confidential Information. The Receiving Party shall not, without the prior written approval of the Disclosing Party, disclose any Confidential Information to any third parties, except to those employees, contractors, and advisors who need to know such information and who have been advised of the confidential nature of such information."]}
+
+Example 2:
+Contract Text: "All information and materials furnished by one party to the other party, whether furnished before or after the date of this Agreement, that are marked as confidential or proprietary or that would reasonably be understood to be confidential given the nature of the information and circumstances of disclosure, shall be deemed 'Confidential Information' and shall be subject to the confidentiality obligations set forth herein for a period of five (5) years from the date of disclosure."
 
-def chunk_text(text: str, chunk_size: int = 10000, overlap: int = 1000) -> List[str]:
-    """Split text into overlapping chunks to handle long contracts"""
+Output: {"clauses": ["All information and materials furnished by one party to the other party, whether furnished before or after the date of this Agreement, that are marked as confidential or proprietary or that would reasonably be understood to be confidential given the nature of the information and circumstances of disclosure, shall be deemed 'Confidential Information' and shall be subject to the confidentiality obligations set forth herein for a period of five (5) years from the date of disclosure."]}
+
+""",
+
+    "liability": """Here are examples of liability clause extraction:
+
+Example 1:
+Contract Text: "IN NO EVENT SHALL EITHER PARTY BE LIABLE TO THE OTHER PARTY FOR ANY INDIRECT, INCIDENTAL, CONSEQUENTIAL, SPECIAL, OR PUNITIVE DAMAGES ARISING OUT OF OR RELATED TO THIS AGREEMENT, EVEN IF SUCH PARTY HAS BEEN ADVISED OF THE POSSIBILITY OF SUCH DAMAGES. THE TOTAL LIABILITY OF PROVIDER UNDER THIS AGREEMENT SHALL NOT EXCEED THE TOTAL FEES PAID BY CLIENT TO PROVIDER DURING THE TWELVE (12) MONTHS IMMEDIATELY PRECEDING THE EVENT GIVING RISE TO THE CLAIM."
+
+Output: {"clauses": ["IN NO EVENT SHALL EITHER PARTY BE LIABLE TO THE OTHER PARTY FOR ANY INDIRECT, INCIDENTAL, CONSEQUENTIAL, SPECIAL, OR PUNITIVE DAMAGES ARISING OUT OF OR RELATED TO THIS AGREEMENT, EVEN IF SUCH PARTY HAS BEEN ADVISED OF THE POSSIBILITY OF SUCH DAMAGES. THE TOTAL LIABILITY OF PROVIDER UNDER THIS AGREEMENT SHALL NOT EXCEED THE TOTAL FEES PAID BY CLIENT TO PROVIDER DURING THE TWELVE (12) MONTHS IMMEDIATELY PRECEDING THE EVENT GIVING RISE TO THE CLAIM."]}
+
+Example 2:
+Contract Text: "Company shall indemnify, defend, and hold harmless Contractor and its officers, directors, employees, and agents from and against any and all claims, damages, losses, liabilities, costs, and expenses (including reasonable attorneys' fees) arising out of or resulting from: (i) any breach by Company of its obligations under this Agreement; (ii) any negligent or willful acts or omissions by Company; or (iii) any claims that Company's materials or instructions infringe upon or violate any intellectual property rights of any third party."
+
+Output: {"clauses": ["Company shall indemnify, defend, and hold harmless Contractor and its officers, directors, employees, and agents from and against any and all claims, damages, losses, liabilities, costs, and expenses (including reasonable attorneys' fees) arising out of or resulting from: (i) any breach by Company of its obligations under this Agreement; (ii) any negligent or willful acts or omissions by Company; or (iii) any claims that Company's materials or instructions infringe upon or violate any intellectual property rights of any third party."]}
+
+"""
+}
+
+
+# Rough characters-per-token ratio for English legal text, used without tiktoken
+CHARS_PER_TOKEN = 4
+
+
+@functools.lru_cache(maxsize=1)
+def _get_encoding() -> Any:
+    """Load the tokenizer once, or return None if tiktoken or its vocabulary is unavailable"""
+    if not HAS_TIKTOKEN:
+        return None
+    try:
+        return tiktoken.get_encoding("cl100k_base")
+    except Exception as e:  # the vocabulary is downloaded on first use
+        logger.warning(f"tiktoken encoding unavailable, chunking by characters: {e}")
+        return None
+
+
+def chunk_text(text: str, chunk_tokens: int = 6000, overlap_tokens: int = 400) -> List[str]:
+    """Split text into overlapping chunks of roughly chunk_tokens tokens to handle long contracts"""
+    encoding = _get_encoding()
+    if encoding is None:
+        return _chunk_by_chars(text, chunk_tokens * CHARS_PER_TOKEN,
+                               overlap_tokens * CHARS_PER_TOKEN)
+    
+    # Encode once and slice the token ids; only the chunks are decoded
+    ids = encoding.encode(text, disallowed_special=())
+    if len(ids) <= chunk_tokens:
+        return [text]
+    
+    step = chunk_tokens - overlap_tokens
+    chunks = [encoding.decode(ids[start:start + chunk_tokens])
+              for start in range(0, len(ids) - overlap_tokens, step)]
+    
+    logger.debug("Split text into %d chunks", len(chunks))
+    return chunks
+
+
+def _chunk_by_chars(text: str, chunk_size: int, overlap: int) -> List[str]:
+    """Split text into overlapping chunks of chunk_size characters"""
     if len(text) <= chunk_size:
         return [text]
     
@@ -27,212 +246,615 @@ def chunk_text(text: str, chunk_size: int = 10000, overlap: int = 1000) -> List[
             break
         start += chunk_size - overlap
     
-    logger.debug(f"Split text into {len(chunks)} chunks")
+    logger.debug("Split text into %d chunks", len(chunks))
     return chunks
 
 
-def find_relevant_sections(contract_text: str, clause_type: str) -> List[str]:
-    """Find sections likely to contain the clause using keywords"""
-    
-    keywords = {
-        "termination": [
-            "terminat", "cancel", "expire", "dissolve", "cease", 
-            "end of term", "term and termination", "duration", "renewal"
-        ],
-        "confidentiality": [
-            "confidential", "proprietary", "non-disclosure", "NDA", 
-            "secret", "information", "disclosure", "protect"
-        ],
-        "liability": [
-            "liab", "indemnif", "warrant", "disclaim", "limit", 
-            "cap", "damages", "loss", "harm", "injury", "risk"
-        ]
-    }
-    
-    relevant_keywords = keywords.get(clause_type, [])
-    
-    # Split by paragraphs
-    paragraphs = re.split(r'\n\s*\n', contract_text)
+CLAUSE_KEYWORDS: Dict[str, Tuple[str, ...]] = {
+    "termination": (
+        "terminat", "cancel", "expire", "dissolve", "cease", 
+        "end of term", "term and termination", "duration", "renewal"
+    ),
+    "confidentiality": (
+        "confidential", "proprietary", "non-disclosure", "NDA", 
+        "secret", "information", "disclosure", "protect"
+    ),
+    "liability": (
+        "liab", "indemnif", "warrant", "disclaim", "limit", 
+        "cap", "damages", "loss", "harm", "injury", "risk"
+    )
+}
+
+# Lowercased once at import for the Aho-Corasick automata
+CLAUSE_KEYWORDS_LOWER = {
+    clause_type: tuple(keyword.lower() for keyword in keywords)
+    for clause_type, keywords in CLAUSE_KEYWORDS.items()
+}
+
+# One case-insensitive pattern per clause type, compiled once at import.
+# The lookahead reports a match at every keyword start (overlaps included)
+# and each keyword is its own group, so match.lastindex identifies it.
+KEYWORD_PATTERNS = {
+    clause_type: re.compile(
+        "(?=" + "|".join(f"({re.escape(kw)})" for kw in keywords) + ")",
+        re.IGNORECASE
+    )
+    for clause_type, keywords in CLAUSE_KEYWORDS.items()
+}
+
+
+def _build_automaton(keywords: Tuple[str, ...]) -> Any:
+    """Build an Aho-Corasick automaton whose values are keyword indices"""
+    automaton = ahocorasick.Automaton()
+    for index, keyword in enumerate(keywords):
+        automaton.add_word(keyword, index)
+    automaton.make_automaton()
+    return automaton
+
+
+# Aho-Corasick finds every keyword occurrence in one traversal; without
+# pyahocorasick the precompiled KEYWORD_PATTERNS are used instead
+KEYWORD_AUTOMATA = {
+    clause_type: _build_automaton(keywords)
+    for clause_type, keywords in CLAUSE_KEYWORDS_LOWER.items()
+} if HAS_AHOCORASICK else {}
+
+
+def find_keyword_hits(text: str, clause_type: str) -> List[Tuple[int, int]]:
+    """Return (start offset, keyword index) for every clause_type keyword occurrence"""
+    automaton = KEYWORD_AUTOMATA.get(clause_type)
+    if automaton is not None:
+        keywords = CLAUSE_KEYWORDS_LOWER[clause_type]
+        return [(end - len(keywords[index]) + 1, index)
+                for end, index in automaton.iter(text.lower())]
+    return [(m.start(), m.lastindex - 1) for m in KEYWORD_PATTERNS[clause_type].finditer(text)]
+
+
+# Long paragraphs are cut down to windows around their keyword hits
+WINDOW_BEFORE = 800
+WINDOW_AFTER = 1500
+WINDOW_MERGE_GAP = 200
+# Sent instead of the whole contract when no keyword matches at all
+FALLBACK_SECTION_CHARS = 10000
+
+
+def _keyword_windows(length: int, hits: List[Tuple[int, int]]) -> List[Tuple[int, int, int]]:
+    """Merge windows around hits into (score, start, end) spans scored by their distinct keywords"""
+    windows: List[Tuple[int, int, set]] = []
+    for start, index in sorted(hits):
+        lo, hi = max(0, start - WINDOW_BEFORE), min(length, start + WINDOW_AFTER)
+        if windows and lo - windows[-1][1] < WINDOW_MERGE_GAP:
+            prev_lo, prev_hi, keywords = windows[-1]
+            keywords.add(index)
+            windows[-1] = (prev_lo, max(prev_hi, hi), keywords)
+        else:
+            windows.append((lo, hi, {index}))
+    return [(len(keywords), lo, hi) for lo, hi, keywords in windows]
+
+
+_PARA_SPLIT_RE = re.compile(r'\n\s*\n')
+
+
+def _iter_paragraphs(text: str) -> Iterator[Tuple[int, int]]:
+    """Yield (start, end) spans of blank-line separated paragraphs without building the split list"""
+    start = 0
+    for match in _PARA_SPLIT_RE.finditer(text):
+        yield start, match.start()
+        start = match.end()
+    yield start, len(text)
+
+
+def find_relevant_spans(contract_text: str, clause_type: str) -> Tuple[List[Tuple[int, int, int]], bool]:
+    """Find (score, start, end) spans likely to contain the clause using keywords.
+
+    Returns the spans and whether they are only the start-of-contract
+    fallback because no keyword matched.
+    """
+    fallback = [(0, 0, min(len(contract_text), FALLBACK_SECTION_CHARS))]
+    if clause_type not in CLAUSE_KEYWORDS:
+        return fallback, True
     
-    relevant_sections = []
-    for para in paragraphs:
+    # Single pass: the keyword hits both select and score each paragraph
+    scored_spans = []
+    for para_start, para_end in _iter_paragraphs(contract_text):
+        para = contract_text[para_start:para_end]
         if len(para.strip()) < 50:  # Skip very short paragraphs
             continue
         
-        para_lower = para.lower()
-        # Check if paragraph contains any keywords
-        if any(keyword.lower() in para_lower for keyword in relevant_keywords):
-            relevant_sections.append(para)
+        hits = find_keyword_hits(para, clause_type)
+        if not hits:
+            continue
+        if len(para) <= WINDOW_BEFORE + WINDOW_AFTER:
+            scored_spans.append((len({index for _, index in hits}), para_start, para_end))
+        else:
+            scored_spans.extend((score, para_start + lo, para_start + hi)
+                                for score, lo, hi in _keyword_windows(len(para), hits))
     
-    logger.debug(f"Found {len(relevant_sections)} relevant sections for {clause_type}")
+    logger.debug("Found %d relevant sections for %s", len(scored_spans), clause_type)
     
-    # If too many sections, take the most keyword-dense ones
-    if len(relevant_sections) > 10:
-        # Score by keyword density
-        scored_sections = []
-        for section in relevant_sections:
-            section_lower = section.lower()
-            score = sum(1 for kw in relevant_keywords if kw.lower() in section_lower)
-            scored_sections.append((score, section))
-        
-        scored_sections.sort(reverse=True, key=lambda x: x[0])
-        relevant_sections = [s[1] for s in scored_sections[:10]]
+    # If too many sections, take the most keyword-dense ones (ties keep document order)
+    if len(scored_spans) > 10:
+        scored_spans = heapq.nlargest(10, scored_spans, key=lambda x: x[0])
     
-    return relevant_sections if relevant_sections else [contract_text]
+    if not scored_spans:
+        # Operative clauses are usually front-loaded, so without any keyword
+        # match only the start of the contract is sent
+        return fallback, True
+    
+    return scored_spans, False
+
+
+def find_relevant_sections(contract_text: str, clause_type: str) -> Tuple[List[str], bool]:
+    """Find sections likely to contain the clause using keywords.
+
+    Returns the sections and whether they are only the start-of-contract
+    fallback because no keyword matched.
+    """
+    spans, is_fallback = find_relevant_spans(contract_text, clause_type)
+    return [contract_text[start:end] for _, start, end in spans], is_fallback
+
+
+def _merge_spans(spans: List[Tuple[int, int]]) -> List[Tuple[int, int]]:
+    """Merge overlapping or touching (start, end) spans, sorted by start"""
+    merged: List[Tuple[int, int]] = []
+    for start, end in sorted(spans):
+        if merged and start <= merged[-1][1]:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    return merged
 
 
-def deduplicate_clauses(clauses: List[str]) -> List[str]:
-    """Remove duplicate or very similar clauses"""
+def _load_json_object(response: str) -> Dict[str, Any]:
+    """Parse a JSON-mode response, raising ValueError unless it is a JSON object"""
+    try:
+        data = json.loads(response)
+    except json.JSONDecodeError as e:
+        raise ValueError(f"invalid JSON: {e}") from e
+    if not isinstance(data, dict):
+        raise ValueError("response is not a JSON object")
+    return data
+
+
+def deduplicate_clauses(clauses: List[str], threshold: float = 80.0) -> List[str]:
+    """Remove duplicate or very similar clauses.
+
+    Clauses whose token_set_ratio is at least threshold are clustered together
+    and the longest clause of each cluster is kept, in original order.
+    """
+    clauses = [c for c in clauses if c.strip()]
     if not clauses:
         return []
     
-    unique = []
-    for clause in clauses:
-        clause_clean = clause.strip().lower()
+    # Normalize each clause once; both strategies compare these
+    normalized = [c.strip().lower() for c in clauses]
+    if not HAS_RAPIDFUZZ:
+        return _deduplicate_by_substring(clauses, normalized)
+    
+    scores = fuzz_process.cdist(normalized, normalized, scorer=fuzz.token_set_ratio, workers=-1)
+    
+    # Union-find over every pair above the threshold (upper triangle only)
+    parent = list(range(len(clauses)))
+    
+    def find(i: int) -> int:
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+    
+    for i, j in zip(*np.nonzero(np.triu(scores >= threshold, k=1))):
+        parent[find(int(i))] = find(int(j))
+    
+    longest: Dict[int, int] = {}
+    for i, clause in enumerate(normalized):
+        root = find(i)
+        if root not in longest or len(clause) > len(normalized[longest[root]]):
+            longest[root] = i
+    
+    return [clauses[i] for i in sorted(longest.values())]
+
+
+def _deduplicate_by_substring(clauses: List[str], normalized: List[str]) -> List[str]:
+    """Fallback deduplication: drop clauses contained in an earlier one or vice versa"""
+    unique_indices: List[int] = []
+    for i, clause_clean in enumerate(normalized):
         # Check if this clause is substantially different from existing ones
         is_duplicate = False
-        for existing in unique:
-            existing_clean = existing.strip().lower()
-            # If 80% similar, consider duplicate
+        for j in unique_indices:
+            existing_clean = normalized[j]
             if clause_clean in existing_clean or existing_clean in clause_clean:
                 is_duplicate = True
                 break
         
         if not is_duplicate:
-            unique.append(clause)
+            unique_indices.append(i)
     
-    return unique
+    return [clauses[i] for i in unique_indices]
+
+
+@dataclass(frozen=True)
+class RetryConfig:
+    """Exponential backoff settings for transient API errors"""
+    max_retries: int = 5
+    initial_delay: float = 0.5  # seconds
+    max_delay: float = 30.0  # seconds
+    backoff_factor: float = 2.0
+    jitter: float = 0.5  # seconds of random delay added to each wait
+    
+    def delay(self, attempt: int) -> float:
+        """Seconds to wait before retry number attempt (0-based)"""
+        backoff = min(self.max_delay, self.initial_delay * self.backoff_factor ** attempt)
+        return backoff + random.uniform(0, self.jitter)
+
+
+TRANSIENT_STATUS_CODES = {429, 500, 502, 503, 504}
+
+
+class PromptCacheHintRejected(Exception):
+    """The endpoint rejected the prompt_cache_key field; the hint is now disabled"""
+
+
+def is_transient_error(error: Exception) -> bool:
+    """Whether an API error is worth retrying (rate limits, server errors, timeouts)"""
+    import openai
+    if isinstance(error, PromptCacheHintRejected):
+        return True  # the retry is sent without the hint
+    status_code = getattr(error, "status_code", None)
+    if status_code is not None:
+        return status_code in TRANSIENT_STATUS_CODES
+    # Timeouts and dropped connections carry no status code
+    return isinstance(error, openai.APIConnectionError)
+
+
+def retry_transient(func):
+    """Retry an async LLMProcessor method on transient errors using self.retry_config.
+
+    Permanent errors (e.g. 400, 401, 422) are raised immediately.
+    """
+    @functools.wraps(func)
+    async def wrapper(self, *args, **kwargs):
+        retry_config: RetryConfig = self.retry_config
+        attempt = 0
+        while True:
+            try:
+                return await func(self, *args, **kwargs)
+            except Exception as e:
+                if not is_transient_error(e):
+                    logger.error(f"API call failed: {e}")
+                    raise
+                if attempt >= retry_config.max_retries:
+                    logger.error(f"API call failed after {attempt} retries: {e}")
+                    raise
+                delay = retry_config.delay(attempt)
+                attempt += 1
+                logger.warning(f"Transient API error, retry {attempt}/{retry_config.max_retries} "
+                               f"in {delay:.1f}s: {e}")
+                await asyncio.sleep(delay)
+    return wrapper
+
+
+class AdaptiveConcurrencyLimiter:
+    """Bound concurrent API calls, shrinking the limit on rate limits (HTTP 429)
+    and growing it back after a run of successful calls"""
+
+    def __init__(self, max_connections: int = 8, increase_after: int = 10):
+        self.max_connections = max(1, max_connections)
+        self.limit = self.max_connections
+        self.increase_after = increase_after
+        self._active = 0
+        self._successes = 0
+        self._condition: Optional[asyncio.Condition] = None
+
+    def _get_condition(self) -> asyncio.Condition:
+        # Created lazily so it binds to the running event loop
+        if self._condition is None:
+            self._condition = asyncio.Condition()
+        return self._condition
+
+    async def __aenter__(self) -> "AdaptiveConcurrencyLimiter":
+        condition = self._get_condition()
+        async with condition:
+            await condition.wait_for(lambda: self._active < self.limit)
+            self._active += 1
+        return self
+
+    async def __aexit__(self, *exc_info: Any) -> None:
+        condition = self._get_condition()
+        async with condition:
+            self._active -= 1
+            condition.notify_all()
+
+    def record_success(self) -> None:
+        """Count a successful call, raising the limit after enough in a row"""
+        self._successes += 1
+        if self._successes >= self.increase_after and self.limit < self.max_connections:
+            self.limit += 1
+            self._successes = 0
+            logger.debug("Raised API concurrency limit to %d", self.limit)
+
+    def record_rate_limit(self) -> None:
+        """Lower the limit after the provider rejected a call with HTTP 429"""
+        self._successes = 0
+        if self.limit > 1:
+            self.limit -= 1
+            logger.warning(f"Rate limited, lowering API concurrency limit to {self.limit}")
+
+
+class RequestRateLimiter:
+    """Token bucket allowing at most max_rate API calls per time_period seconds"""
+
+    def __init__(self, max_rate: float, time_period: float = 60.0):
+        self.max_rate = max_rate
+        self.time_period = time_period
+        self._tokens = float(max_rate)
+        self._updated = time.monotonic()
+        self._lock: Optional[asyncio.Lock] = None
+
+    def _get_lock(self) -> asyncio.Lock:
+        # Created lazily so it binds to the running event loop
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        return self._lock
+
+    async def acquire(self) -> None:
+        """Wait until another call fits within the rate"""
+        async with self._get_lock():
+            while True:
+                now = time.monotonic()
+                refill = (now - self._updated) * self.max_rate / self.time_period
+                self._tokens = min(self.max_rate, self._tokens + refill)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) * self.time_period / self.max_rate)
 
 
 class LLMProcessor:
     """Process contracts using LLM APIs with improved accuracy"""
     
-    def __init__(self, provider: str = "mistral", model: str = "mistral-small-latest"):
+    def __init__(self, provider: str = "mistral", model: str = "mistral-small-latest",
+                 max_connections: int = 8, retry_config: Optional[RetryConfig] = None,
+                 cache_dir: Optional[Path] = None, cache_ttl: float = 30 * 24 * 3600,
+                 cache_max_entries: int = 10000, force_refresh: bool = False,
+                 requests_per_minute: Optional[float] = None):
         self.provider = provider
         self.model = model
+        self.max_connections = max(1, max_connections)
+        self.retry_config = retry_config or RetryConfig()
+        # Responses are cached on disk when cache_dir is set; force_refresh skips
+        # reads but still stores the fresh responses
+        self.cache_dir = cache_dir
+        self.cache_ttl = cache_ttl
+        self.cache_max_entries = cache_max_entries
+        self.force_refresh = force_refresh
+        self._system_messages: Dict[Tuple[str, bool], Dict[str, str]] = {}
+        # Send prompt_cache_key hints unless MISTRAL_PROMPT_CACHE_HINT=0; they are
+        # switched off automatically if the endpoint rejects the field
+        self.prompt_cache_hint = os.getenv("MISTRAL_PROMPT_CACHE_HINT", "1") != "0"
         self.client: Any = None
+        self.limiter = AdaptiveConcurrencyLimiter(max_connections)
+        self.rate_limiter = RequestRateLimiter(requests_per_minute) if requests_per_minute else None
+        self.prompt_tokens = 0
+        self.cached_prompt_tokens = 0
         self._init_client()
     
     def _init_client(self) -> None:
         """Initialize API client based on provider"""
         if self.provider == "mistral":
+            import httpx
             import openai
             api_key = os.getenv("MISTRAL_API_KEY")
             if not api_key:
                 raise ValueError("MISTRAL_API_KEY not found in environment variables")
             
-            self.client = openai.OpenAI(
+            # One pooled client shared by every request, so keep-alive connections
+            # (and HTTP/2 multiplexing when h2 is installed) skip repeated TLS handshakes
+            http_client = httpx.AsyncClient(
+                http2=HAS_HTTP2,
+                timeout=60,
+                limits=httpx.Limits(
+                    max_connections=self.max_connections,
+                    max_keepalive_connections=self.max_connections
+                )
+            )
+            self.client = openai.AsyncOpenAI(
                 api_key=api_key,
-                base_url="https://api.mistral.ai/v1"
+                base_url="https://api.mistral.ai/v1",
+                http_client=http_client,
+                max_retries=0  # retries are handled by retry_transient
             )
             logger.info(f"Initialized Mistral client with model: {self.model}")
         else:
             raise ValueError(f"Unsupported provider: {self.provider}")
     
-    @retry(stop=stop_after_attempt(3), wait=wait_exponential(multiplier=1, min=2, max=10))
-    def _call_api(self, messages: List[Dict[str, str]], temperature: float = 0.0, 
-                  max_tokens: int = 8192) -> str:
-        """Call LLM API with retry logic"""
-        try:
-            response = self.client.chat.completions.create(
-                model=self.model,
-                messages=messages,  # type: ignore[arg-type]
-                temperature=temperature,
-                max_tokens=max_tokens
-            )
-            return response.choices[0].message.content or ""
+    async def aclose(self) -> None:
+        """Close the API client and its pooled HTTP connections"""
+        await self.client.close()
+    
+    async def _call_api(self, messages: List[Dict[str, str]], temperature: float = 0.0, 
+                        max_tokens: int = 8192,
+                        response_format: Optional[Dict[str, str]] = None,
+                        cache_hint: Optional[str] = None,
+                        parse: Optional[Callable[[str], Any]] = None) -> Any:
+        """Call LLM API, serving identical requests from the response cache.
+
+        cache_hint names the shared prompt prefix for the provider's prompt cache.
+        parse turns the reply into the returned result; a reply it rejects with
+        ValueError is raised to the caller and never cached.
+        """
+        if parse is None:
+            parse = lambda reply: reply
+        if self.cache_dir is None:
+            return parse(await self._request(messages, temperature, max_tokens,
+                                             response_format, cache_hint))
+        
+        key = make_llm_cache_key(self.model, messages, temperature,
+                                 max_tokens=max_tokens, response_format=response_format)
+        if not self.force_refresh:
+            cached = get_cached(key, self.cache_dir)
+            if cached is not None and time.time() - cached.get("created", 0) <= self.cache_ttl:
+                try:
+                    return parse(cached["response"])
+                except ValueError:
+                    pass  # unusable entry, fetch a fresh reply
         
+        response = await self._request(messages, temperature, max_tokens, response_format,
+                                       cache_hint)
+        result = parse(response)
+        # Written off the event loop; the occasional eviction scan can be slow
+        try:
+            await asyncio.to_thread(put_cached, key,
+                                    {"response": response, "created": time.time()},
+                                    self.cache_dir, self.cache_max_entries)
         except Exception as e:
-            logger.error(f"API call failed: {e}")
-            raise
+            logger.warning(f"Could not cache LLM response: {e}")
+        return result
+    
+    @retry_transient
+    async def _request(self, messages: List[Dict[str, str]], temperature: float,
+                       max_tokens: int, response_format: Optional[Dict[str, str]],
+                       cache_hint: Optional[str] = None) -> str:
+        """Send one chat completion request with retry logic and adaptive concurrency"""
+        kwargs: Dict[str, Any] = {}
+        if response_format is not None:
+            kwargs["response_format"] = response_format
+        if cache_hint is not None and self.prompt_cache_hint:
+            kwargs["extra_body"] = {"prompt_cache_key": cache_hint}
+        
+        async with self.limiter:
+            if self.rate_limiter is not None:
+                await self.rate_limiter.acquire()
+            try:
+                response = await self.client.chat.completions.create(
+                    model=self.model,
+                    messages=messages,  # type: ignore[arg-type]
+                    temperature=temperature,
+                    max_tokens=max_tokens,
+                    **kwargs
+                )
+            except Exception as e:
+                status_code = getattr(e, "status_code", None)
+                if status_code == 429:
+                    self.limiter.record_rate_limit()
+                if ("extra_body" in kwargs and status_code in (400, 422)
+                        and "prompt_cache_key" in str(e)):
+                    if self.prompt_cache_hint:
+                        logger.warning("Endpoint rejected prompt_cache_key, disabling prompt cache hints")
+                        self.prompt_cache_hint = False
+                    raise PromptCacheHintRejected(str(e)) from e
+                raise
+        
+        self.limiter.record_success()
+        self._record_usage(response)
+        return response.choices[0].message.content or ""
+    
+    def _record_usage(self, response: Any) -> None:
+        """Accumulate prompt token usage, including tokens served from the provider's prefix cache"""
+        usage = getattr(response, "usage", None)
+        if usage is None:
+            return
+        self.prompt_tokens += getattr(usage, "prompt_tokens", 0) or 0
+        details = getattr(usage, "prompt_tokens_details", None)
+        self.cached_prompt_tokens += getattr(details, "cached_tokens", 0) or 0
     
-    def extract_clause(self, contract_text: str, clause_type: str,
+    def log_token_usage(self) -> None:
+        """Log total prompt tokens and the prefix cache hit rate"""
+        if not self.prompt_tokens:
+            return
+        hit_rate = self.cached_prompt_tokens / self.prompt_tokens * 100
+        logger.info(f"Prompt tokens: {self.prompt_tokens} "
+                    f"(cached: {self.cached_prompt_tokens}, {hit_rate:.1f}%)")
+    
+    async def extract_clause(self, contract_text: str, clause_type: str,
                       use_few_shot: bool = True) -> str:
         """Extract specific clause from contract using improved multi-stage approach"""
+        clause, _ = await self._extract_clause(contract_text, clause_type, use_few_shot)
+        return clause
+    
+    async def _extract_clause(self, contract_text: str, clause_type: str,
+                              use_few_shot: bool) -> Tuple[str, bool]:
+        """Extract a clause, also reporting whether some section requests failed"""
         
         # Stage 1: Find relevant sections using keywords
-        logger.debug(f"Stage 1: Finding relevant sections for {clause_type}")
-        relevant_sections = find_relevant_sections(contract_text, clause_type)
+        logger.debug("Stage 1: Finding relevant sections for %s", clause_type)
+        relevant_sections, is_fallback = find_relevant_sections(contract_text, clause_type)
         
-        # Stage 2: Extract from each relevant section
-        all_findings = []
-        
-        if len(relevant_sections) == 1 and relevant_sections[0] == contract_text:
-            # No specific sections found, use chunking on full text
-            logger.debug(f"Stage 2: No specific sections found, using full text chunking")
-            chunks = chunk_text(contract_text, chunk_size=10000, overlap=1000)
-            
-            for i, chunk in enumerate(chunks):
-                logger.debug(f"Processing chunk {i+1}/{len(chunks)}")
-                result = self._extract_from_text(chunk, clause_type, use_few_shot)
-                if result != "Not found":
-                    all_findings.append(result)
+        # Stage 2: Extract from each relevant section concurrently
+        if is_fallback:
+            logger.debug("Stage 2: No %s keywords found, using the start of the contract", clause_type)
         else:
-            # Process relevant sections
-            logger.debug(f"Stage 2: Processing {len(relevant_sections)} relevant sections")
-            for i, section in enumerate(relevant_sections[:8]):  # Limit to 8 sections
-                logger.debug(f"Processing section {i+1}/{min(len(relevant_sections), 8)}")
-                result = self._extract_from_text(section, clause_type, use_few_shot)
-                if result != "Not found":
-                    all_findings.append(result)
+            logger.debug("Stage 2: Processing %d relevant sections", min(len(relevant_sections), 8))
+        targets = relevant_sections[:8]  # Limit to 8 sections
         
-        # Stage 3: Merge and deduplicate findings
-        if not all_findings:
-            logger.debug(f"No {clause_type} clause found")
-            return "Not found"
+        responses = await asyncio.gather(
+            *[self._extract_from_text(text, clause_type, use_few_shot) for text in targets],
+            return_exceptions=True
+        )
+        
+        all_clauses: List[str] = []
+        errors = []
+        for response in responses:
+            if isinstance(response, Exception):
+                errors.append(response)
+            else:
+                all_clauses.extend(response)
         
-        # Split any multi-clause responses
-        all_clauses = []
-        for finding in all_findings:
-            # Split by delimiter if present
-            clauses = [c.strip() for c in finding.split("|||")]
-            all_clauses.extend(clauses)
+        # A partial failure still yields the other sections' findings but is
+        # reported so the result is not cached; only fail the clause when
+        # every request failed
+        partial = bool(errors)
+        if errors:
+            if len(errors) == len(responses):
+                raise errors[0]
+            logger.warning(f"{len(errors)}/{len(responses)} {clause_type} requests failed: {errors[0]}")
+        
+        # Stage 3: Merge and deduplicate findings
+        if not all_clauses:
+            logger.debug("No %s clause found", clause_type)
+            return "Not found", partial
         
         # Deduplicate
         unique_clauses = deduplicate_clauses(all_clauses)
         
-        logger.debug(f"Found {len(unique_clauses)} unique {clause_type} clause(s)")
+        logger.debug("Found %d unique %s clause(s)", len(unique_clauses), clause_type)
         
         # Return merged result
-        return " ||| ".join(unique_clauses) if unique_clauses else "Not found"
+        return (" ||| ".join(unique_clauses) if unique_clauses else "Not found"), partial
     
-    def _extract_from_text(self, text: str, clause_type: str, use_few_shot: bool) -> str:
-        """Extract clause from a specific text segment"""
-        system_prompt = self._build_extraction_system_prompt()
-        user_prompt = self._build_extraction_user_prompt(text, clause_type, use_few_shot)
-        
+    async def _extract_from_text(self, text: str, clause_type: str, use_few_shot: bool) -> List[str]:
+        """Extract the clauses found in a specific text segment"""
         messages: List[Dict[str, str]] = [
-            {"role": "system", "content": system_prompt},
-            {"role": "user", "content": user_prompt}
+            self._extraction_system_message(clause_type, use_few_shot),
+            {"role": "user", "content": f"Contract Text to Analyze:\n---\n{text}\n---"}
         ]
         
-        response = self._call_api(messages, temperature=0.0, max_tokens=8192)
-        return self._parse_clause_response(response)
+        cache_hint = f"cuad-{self.model}-{clause_type}-{'fs' if use_few_shot else 'nfs'}"
+        return await self._call_api(messages, temperature=0.0, max_tokens=3000,
+                                    response_format={"type": "json_object"},
+                                    cache_hint=cache_hint,
+                                    parse=self._parse_clause_list_response)
     
-    def generate_summary(self, contract_text: str,
+    async def generate_summary(self, contract_text: str,
                         word_limit: tuple = (100, 150)) -> str:
         """Generate contract summary"""
         
-        # For very long contracts, use first portion and key sections
+        # Contracts that span several chunks are map-reduced: summarize every
+        # chunk concurrently, then summarize the chunk notes. Anything that
+        # fits in one chunk is summarized directly.
+        chunks = [contract_text]
         if len(contract_text) > 20000:
-            # Take beginning and search for key sections
-            summary_text = contract_text[:15000]
-            
-            # Try to find key sections
-            key_terms = ["whereas", "recitals", "purpose", "obligations", "payment", 
-                        "term", "termination", "liability", "indemnif"]
-            
-            for term in key_terms:
-                pattern = re.compile(rf'\n[^\n]*{term}[^\n]*\n', re.IGNORECASE)
-                matches = pattern.findall(contract_text)
-                if matches:
-                    summary_text += "\n\n" + "\n".join(matches[:3])
+            chunks = chunk_text(contract_text, chunk_tokens=8000, overlap_tokens=0)
+        
+        if len(chunks) > 1:
+            notes = await asyncio.gather(*[self._summarize_chunk(chunk) for chunk in chunks])
+            summary_text = "\n\n".join(
+                f"Part {i}:\n{note.strip()}" for i, note in enumerate(notes, 1)
+            )
+            source_label = "Notes on Each Part of the Contract"
         else:
             summary_text = contract_text
-        
-        system_prompt = """You are a legal expert specializing in contract analysis.
-Your task is to generate concise, accurate summaries of legal contracts.
-Focus on extracting the most important information."""
+            source_label = "Contract Text"
         
         user_prompt = f"""Please provide a summary of the following contract in {word_limit[0]}-{word_limit[1]} words.
 
@@ -241,214 +863,262 @@ The summary MUST include:
 2. Key obligations of each party (what must each party do?)
 3. Notable risks or penalties (what happens if obligations aren't met?)
 
-Contract Text:
-{summary_text[:18000]}
-
 Provide ONLY the summary, nothing else.
 
+{source_label}:
+{summary_text}
+
 Summary:"""
         
         messages: List[Dict[str, str]] = [
-            {"role": "system", "content": system_prompt},
+            {"role": "system", "content": _SUMMARY_SYSTEM_PROMPT},
             {"role": "user", "content": user_prompt}
         ]
         
-        return self._call_api(messages, temperature=0.3, max_tokens=500)
+        return await self._call_api(messages, temperature=0.3, max_tokens=500)
     
-    def _build_extraction_system_prompt(self) -> str:
-        """Build system prompt for clause extraction"""
-        return """You are a legal AI assistant specialized in contract analysis and clause extraction.
+    async def _summarize_chunk(self, chunk: str) -> str:
+        """Summarize one part of a long contract as short bullets for the reduce step"""
+        user_prompt = f"""Summarize this part of a contract in at most 30 words as short bullet points.
+Cover its purpose, the parties' obligations and any risks or penalties it mentions.
 
-Your task is to identify and extract specific types of clauses from legal contracts with high accuracy.
+Provide ONLY the bullet points, nothing else.
 
-CRITICAL INSTRUCTIONS:
-- Extract ONLY the relevant clause text, maintaining exact wording from the contract
-- If multiple instances of the clause exist, extract ALL of them separated by " ||| "
-- Extract complete clauses - don't cut off mid-sentence
-- If the clause spans multiple paragraphs, include all relevant paragraphs
-- If the clause is definitely not present in the provided text, respond with "NOT_FOUND"
-- Be thorough but precise - include all relevant text but exclude unrelated content
-- Look for the substance of the clause, not just section headers"""
-    
-    def _build_extraction_user_prompt(self, contract_text: str,
-                                     clause_type: str,
-                                     use_few_shot: bool) -> str:
-        """Build QA-style user prompt for clause extraction"""
+Contract Excerpt:
+{chunk}
+
+Bullet Points:"""
         
-        examples = ""
-        if use_few_shot:
-            examples = self._get_few_shot_examples(clause_type)
+        messages: List[Dict[str, str]] = [
+            {"role": "system", "content": _SUMMARY_SYSTEM_PROMPT},
+            {"role": "user", "content": user_prompt}
+        ]
         
-        questions = {
-            "termination": """Question: What are the termination provisions in this contract?
-
-Description: Look for clauses that specify:
-- Conditions under which the agreement can be terminated (termination for cause, convenience, etc.)
-- Notice periods required for termination
-- Rights of either party to terminate
-- Automatic termination conditions
-- Effects of termination
-- Survival of obligations after termination""",
-            
-            "confidentiality": """Question: What are the confidentiality and non-disclosure obligations?
-
-Description: Look for clauses that specify:
-- What information is considered confidential or proprietary
-- Obligations to protect confidential information
-- Restrictions on disclosure to third parties
-- Permitted uses of confidential information
-- Duration of confidentiality obligations
-- Exceptions to confidentiality (e.g., publicly available information)
-- Return or destruction of confidential information""",
-            
-            "liability": """Question: What are the liability, limitation of liability, and indemnification provisions?
+        return await self._call_api(messages, temperature=0.0, max_tokens=80)
+    
+    def _extraction_system_message(self, clause_type: str, use_few_shot: bool) -> Dict[str, str]:
+        """Build (once per clause type) the system message holding every static instruction.
 
-Description: Look for clauses that specify:
-- Limitations on liability (caps on damages, excluded types of damages)
-- Indemnification obligations (who indemnifies whom and for what)
-- Disclaimers of warranties
-- Allocation of risk between parties
-- Liability for breach of specific obligations
-- Exclusions of consequential or indirect damages
-- Maximum liability amounts"""
-        }
+        The question, few-shot examples and output format all live here so the
+        whole message is a byte-identical prefix the provider can serve from its
+        prompt cache; only the contract text goes in the user message.
+        """
+        key = (clause_type, use_few_shot)
+        message = self._system_messages.get(key)
+        if message is not None:
+            return message
         
-        question_text = questions.get(clause_type, f"What are the {clause_type} provisions?")
+        examples = _FEW_SHOT.get(clause_type, "") if use_few_shot else ""
+        question_text = _CLAUSE_QUESTIONS.get(clause_type, f"What are the {clause_type} provisions?")
         
-        prompt = f"""{question_text}
+        content = f"""{_SYSTEM_PROMPT}
 
-{examples}
+{question_text}
 
-Contract Text to Analyze:
----
-{contract_text}
----
+{examples}
 
 Instructions:
 - Extract ALL relevant clauses that answer the question above
-- If multiple relevant clauses exist in different parts of the text, extract all of them separated by " ||| "
+- If multiple relevant clauses exist in different parts of the text, extract each of them as a separate list item
 - Provide the exact text from the contract - do not paraphrase or summarize
 - Include complete sentences and paragraphs
-- If you find NO relevant clause in this text, respond with exactly "NOT_FOUND"
-
-Extracted Clause(s):"""
+- Respond with exactly {{"clauses": ["<exact clause text>", ...]}}, or {{"clauses": []}} if you find NO relevant clause in the contract text"""
         
-        return prompt
+        message = {"role": "system", "content": content}
+        self._system_messages[key] = message
+        return message
+    
+    def _parse_clause_list_response(self, response: str) -> List[str]:
+        """Read the clauses from a per-clause JSON response, raising ValueError if unusable"""
+        return self._clean_clause_list(_load_json_object(response), "clauses")
     
-    def _get_few_shot_examples(self, clause_type: str) -> str:
-        """Get few-shot examples for specific clause type with realistic contract language"""
+    def _clean_clause_list(self, data: Dict[str, Any], field: str) -> List[str]:
+        """Strip the JSON list of clause texts in data[field] and any echoed answer prefix, dropping empty entries"""
+        if field not in data:
+            raise ValueError(f"missing field: {field}")
+        value = data[field]
+        if value is None:  # null is read as "not found"
+            value = []
+        elif isinstance(value, str):
+            value = [value]
+        if not isinstance(value, list):
+            raise ValueError(f"field {field} is not a list: {type(value).__name__}")
         
-        if clause_type == "termination":
-            return """Here are examples of termination clause extraction:
-
-Example 1:
-Contract Text: "Either Party may terminate this Agreement at any time, with or without cause, upon thirty (30) days prior written notice to the other Party. Upon termination for any reason, all rights and obligations of the Parties shall cease, except for those obligations that by their nature are intended to survive termination, including but not limited to confidentiality obligations, payment obligations, and indemnification obligations."
-
-Extracted Clause: Either Party may terminate this Agreement at any time, with or without cause, upon thirty (30) days prior written notice to the other Party. Upon termination for any reason, all rights and obligations of the Parties shall cease, except for those obligations that by their nature are intended to survive termination, including but not limited to confidentiality obligations, payment obligations, and indemnification obligations.
-
-Example 2:
-Contract Text: "This Agreement shall automatically terminate upon the occurrence of any of the following events: (a) the bankruptcy or insolvency of either party; (b) a material breach by either party that remains uncured for thirty (30) days after written notice of such breach; or (c) the mutual written agreement of both parties to terminate."
-
-Extracted Clause: This Agreement shall automatically terminate upon the occurrence of any of the following events: (a) the bankruptcy or insolvency of either party; (b) a material breach by either party that remains uncured for thirty (30) days after written notice of such breach; or (c) the mutual written agreement of both parties to terminate.
+        # An empty list already means "not found", so no text heuristics apply here
+        clauses = (_PREFIX_RE.sub('', str(v).strip(), count=1).strip() for v in value if v)
+        return [c for c in clauses if c]
+    
+    async def analyze_contract(self, contract_text: str,
+                               word_limit: tuple = (100, 150)) -> Dict[str, str]:
+        """Extract all clauses and the summary with a single JSON-mode call"""
+        clause_keys = "\n".join(
+            f'- "{field}": list of verbatim clause texts for {CLAUSE_DESCRIPTIONS[clause_type]}'
+            for clause_type, field in CLAUSE_FIELDS.items()
+        )
+        user_prompt = f"""Analyze the contract below and return a JSON object with exactly these keys:
+{clause_keys}
+- "summary": a {word_limit[0]}-{word_limit[1]} word summary covering the purpose of the agreement, key obligations of each party, and notable risks or penalties
 
-"""
+Contract Text to Analyze:
+---
+{contract_text}
+---"""
         
-        elif clause_type == "confidentiality":
-            return """Here are examples of confidentiality clause extraction:
-
-Example 1:
-Contract Text: "The Receiving Party agrees to hold and maintain the Confidential Information in strict confidence and to take all reasonable precautions to protect such Confidential Information. The Receiving Party shall not, without the prior written approval of the Disclosing Party, disclose any Confidential Information to any third parties, except to those employees, contractors, and advisors who need to know such information and who have been advised of the confidential nature of such information."
-
-Extracted Clause: The Receiving Party agrees to hold and maintain the Confidential Information in strict confidence and to take all reasonable precautions to protect such Confidential Information. The Receiving Party shall not, without the prior written approval of the Disclosing Party, disclose any Confidential Information to any third parties, except to those employees, contractors, and advisors who need to know such information and who have been advised of the confidential nature of such information.
-
-Example 2:
-Contract Text: "All information and materials furnished by one party to the other party, whether furnished before or after the date of this Agreement, that are marked as confidential or proprietary or that would reasonably be understood to be confidential given the nature of the information and circumstances of disclosure, shall be deemed 'Confidential Information' and shall be subject to the confidentiality obligations set forth herein for a period of five (5) years from the date of disclosure."
-
-Extracted Clause: All information and materials furnished by one party to the other party, whether furnished before or after the date of this Agreement, that are marked as confidential or proprietary or that would reasonably be understood to be confidential given the nature of the information and circumstances of disclosure, shall be deemed 'Confidential Information' and shall be subject to the confidentiality obligations set forth herein for a period of five (5) years from the date of disclosure.
-
-"""
+        messages: List[Dict[str, str]] = [
+            {"role": "system", "content": _COMBINED_SYSTEM_PROMPT},
+            {"role": "user", "content": user_prompt}
+        ]
         
-        elif clause_type == "liability":
-            return """Here are examples of liability clause extraction:
-
-Example 1:
-Contract Text: "IN NO EVENT SHALL EITHER PARTY BE LIABLE TO THE OTHER PARTY FOR ANY INDIRECT, INCIDENTAL, CONSEQUENTIAL, SPECIAL, OR PUNITIVE DAMAGES ARISING OUT OF OR RELATED TO THIS AGREEMENT, EVEN IF SUCH PARTY HAS BEEN ADVISED OF THE POSSIBILITY OF SUCH DAMAGES. THE TOTAL LIABILITY OF PROVIDER UNDER THIS AGREEMENT SHALL NOT EXCEED THE TOTAL FEES PAID BY CLIENT TO PROVIDER DURING THE TWELVE (12) MONTHS IMMEDIATELY PRECEDING THE EVENT GIVING RISE TO THE CLAIM."
-
-Extracted Clause: IN NO EVENT SHALL EITHER PARTY BE LIABLE TO THE OTHER PARTY FOR ANY INDIRECT, INCIDENTAL, CONSEQUENTIAL, SPECIAL, OR PUNITIVE DAMAGES ARISING OUT OF OR RELATED TO THIS AGREEMENT, EVEN IF SUCH PARTY HAS BEEN ADVISED OF THE POSSIBILITY OF SUCH DAMAGES. THE TOTAL LIABILITY OF PROVIDER UNDER THIS AGREEMENT SHALL NOT EXCEED THE TOTAL FEES PAID BY CLIENT TO PROVIDER DURING THE TWELVE (12) MONTHS IMMEDIATELY PRECEDING THE EVENT GIVING RISE TO THE CLAIM.
-
-Example 2:
-Contract Text: "Company shall indemnify, defend, and hold harmless Contractor and its officers, directors, employees, and agents from and against any and all claims, damages, losses, liabilities, costs, and expenses (including reasonable attorneys' fees) arising out of or resulting from: (i) any breach by Company of its obligations under this Agreement; (ii) any negligent or willful acts or omissions by Company; or (iii) any claims that Company's materials or instructions infringe upon or violate any intellectual property rights of any third party."
+        return await self._call_api(messages, temperature=0.0, max_tokens=8192,
+                                    response_format={"type": "json_object"},
+                                    parse=self._parse_combined_response)
+    
+    def _parse_combined_response(self, response: str) -> Dict[str, str]:
+        """Map a combined JSON response onto result fields, raising ValueError if unusable"""
+        data = _load_json_object(response)
+        
+        results: Dict[str, str] = {}
+        for field in CLAUSE_FIELDS.values():
+            clauses = self._clean_clause_list(data, field)
+            unique_clauses = deduplicate_clauses(clauses)
+            results[field] = " ||| ".join(unique_clauses) if unique_clauses else "Not found"
+        
+        summary = data.get("summary")
+        if not isinstance(summary, str) or not summary.strip():
+            raise ValueError("missing field: summary")
+        results['summary'] = summary.strip()
+        
+        return results
+    
+    async def extract_all_clauses(self, contract_text: str) -> Dict[str, str]:
+        """Extract every clause type with one JSON-mode call over their relevant sections.
 
-Extracted Clause: Company shall indemnify, defend, and hold harmless Contractor and its officers, directors, employees, and agents from and against any and all claims, damages, losses, liabilities, costs, and expenses (including reasonable attorneys' fees) arising out of or resulting from: (i) any breach by Company of its obligations under this Agreement; (ii) any negligent or willful acts or omissions by Company; or (iii) any claims that Company's materials or instructions infringe upon or violate any intellectual property rights of any third party.
+        Sections are added best-first, taking each clause type's top section in
+        turn, while their merged spans fit in COMBINED_MAX_CHARS; overlapping
+        sections of different clause types are sent once. Raises ValueError when
+        no section fits or the response is not usable, so callers can fall back
+        to extract_clause.
+        """
+        candidates: List[Tuple[int, int, int, int]] = []
+        for clause_type in CLAUSE_FIELDS:
+            spans, _ = find_relevant_spans(contract_text, clause_type)
+            # Spans come back in document order unless there were more than 10;
+            # rank by keyword density (sorted is stable, so ties stay in order)
+            spans = sorted(spans, key=lambda span: -span[0])
+            for rank, (score, start, end) in enumerate(spans[:8]):
+                candidates.append((rank, -score, start, end))
+        
+        selected: List[Tuple[int, int]] = []
+        for _, _, start, end in sorted(candidates):
+            merged = _merge_spans(selected + [(start, end)])
+            # Merged spans are joined with a blank line each
+            if sum(e - s for s, e in merged) + 2 * (len(merged) - 1) <= COMBINED_MAX_CHARS:
+                selected = merged
+        
+        if not selected:
+            raise ValueError("no relevant section fits in a single request")
+        context = "\n\n".join(contract_text[start:end] for start, end in selected)
+        
+        clause_keys = "\n".join(
+            f'- "{clause_type}": {CLAUSE_DESCRIPTIONS[clause_type]}'
+            for clause_type in CLAUSE_FIELDS
+        )
+        user_prompt = f"""Extract clauses from the contract sections below and return a JSON object with exactly these keys, each mapping to a list of verbatim clause texts:
+{clause_keys}
 
-"""
+Contract Sections to Analyze:
+---
+{context}
+---"""
         
-        return ""
-    
-    def _parse_clause_response(self, response: str) -> str:
-        """Parse and clean clause extraction response"""
-        # Remove common prefixes
-        prefixes = [
-            "Extracted Clause(s):",
-            "Extracted Termination Clause:",
-            "Extracted Confidentiality Clause:",
-            "Extracted Liability Clause:",
-            "Extracted Clause:",
-            "The clause is:",
-            "Answer:",
-            "Clause:",
+        messages: List[Dict[str, str]] = [
+            {"role": "system", "content": _ALL_CLAUSES_SYSTEM_PROMPT},
+            {"role": "user", "content": user_prompt}
         ]
         
-        response_cleaned = response.strip()
-        for prefix in prefixes:
-            if response_cleaned.startswith(prefix):
-                response_cleaned = response_cleaned[len(prefix):].strip()
-        
-        # Check for NOT_FOUND
-        if "NOT_FOUND" in response_cleaned.upper() or "NOT FOUND" in response_cleaned.upper():
-            return "Not found"
-        
-        # Check for explicit "no clause" statements
-        no_clause_indicators = [
-            "no termination clause",
-            "no confidentiality clause",
-            "no liability clause",
-            "clause is not present",
-            "does not contain",
-            "no such clause",
-            "clause not found"
-        ]
+        return await self._call_api(messages, temperature=0.0, max_tokens=8192,
+                                    response_format={"type": "json_object"},
+                                    parse=self._parse_all_clauses_response)
+    
+    def _parse_all_clauses_response(self, response: str) -> Dict[str, str]:
+        """Map a multi-clause JSON response onto clause fields, raising ValueError if unusable"""
+        data = _load_json_object(response)
         
-        response_lower = response_cleaned.lower()
-        if any(indicator in response_lower for indicator in no_clause_indicators):
-            return "Not found"
+        results: Dict[str, str] = {}
+        for clause_type, field in CLAUSE_FIELDS.items():
+            clauses = self._clean_clause_list(data, clause_type)
+            unique_clauses = deduplicate_clauses(clauses)
+            results[field] = " ||| ".join(unique_clauses) if unique_clauses else "Not found"
         
-        # Must have minimum length to be valid
-        if len(response_cleaned) < 20:
-            return "Not found"
+        return results
+    
+    async def _extract_clauses(self, contract_text: str) -> Dict[str, Any]:
+        """Extract all clause types, falling back to one request per clause type.
+
+        Sets "partial" to True when some section requests failed, so the
+        result is incomplete.
+        """
+        try:
+            return await self.extract_all_clauses(contract_text)
+        except ValueError as e:
+            logger.warning(f"Multi-clause extraction unusable ({e}), falling back to per-clause prompts")
         
-        return response_cleaned.strip()
+        extracted = await asyncio.gather(*[
+            self._extract_clause(contract_text, clause_type, use_few_shot=True)
+            for clause_type in CLAUSE_FIELDS
+        ])
+        results: Dict[str, Any] = {
+            field: clause for field, (clause, _) in zip(CLAUSE_FIELDS.values(), extracted)
+        }
+        if any(partial for _, partial in extracted):
+            results['partial'] = True
+        return results
     
-    def process_contract(self, contract_text: str) -> Dict[str, str]:
-        """Process entire contract - extract clauses and generate summary"""
-        results: Dict[str, str] = {}
+    async def process_contract(self, contract_text: str) -> Dict[str, Any]:
+        """Process entire contract - extract clauses and generate summary.
+
+        The result has "partial": True when some extraction requests failed.
+        """
+        if len(contract_text) <= COMBINED_MAX_CHARS:
+            logger.info("Analyzing contract with a single combined request...")
+            try:
+                return await self.analyze_contract(contract_text)
+            except ValueError as e:
+                logger.warning(f"Combined response unusable ({e}), falling back to separate requests")
         
-        logger.info("Extracting termination clause...")
-        results['termination_clause'] = self.extract_clause(
-            contract_text, "termination", use_few_shot=True
+        logger.info("Extracting clauses and generating summary...")
+        results, summary = await asyncio.gather(
+            self._extract_clauses(contract_text),
+            self.generate_summary(contract_text)
         )
+        results['summary'] = summary
+        return results
+    
+    async def process_contracts(self, items: Iterable[Tuple[str, str]],
+                                concurrency: int = 16) -> Dict[str, Dict[str, Any]]:
+        """Process (contract_id, contract_text) pairs concurrently, keyed by contract id.
+
+        At most concurrency contracts are in flight, and their API calls share this
+        processor's concurrency and rate limiters. A contract that fails maps to
+        {"error": message} instead of aborting the batch.
+        """
+        semaphore = asyncio.Semaphore(max(1, concurrency))
         
-        logger.info("Extracting confidentiality clause...")
-        results['confidentiality_clause'] = self.extract_clause(
-            contract_text, "confidentiality", use_few_shot=True
-        )
+        async def run(contract_text: str) -> Dict[str, Any]:
+            async with semaphore:
+                return await self.process_contract(contract_text)
         
-        logger.info("Extracting liability clause...")
-        results['liability_clause'] = self.extract_clause(
-            contract_text, "liability", use_few_shot=True
+        items = list(items)
+        outcomes = await asyncio.gather(
+            *[run(contract_text) for _, contract_text in items],
+            return_exceptions=True
         )
         
-        logger.info("Generating contract summary...")
-        results['summary'] = self.generate_summary(contract_text)
-        
-        return results
\ No newline at end of file
+        results: Dict[str, Dict[str, Any]] = {}
+        for (contract_id, _), outcome in zip(items, outcomes):
+            if isinstance(outcome, BaseException):
+                logger.error(f"Error processing {contract_id}: {outcome}")
+                results[contract_id] = {"error": str(outcome)}
+            else:
+                results[contract_id] = outcome
+        return results
@@ -1,53 +1,98 @@
 from pathlib import Path
+from typing import Iterator
 import logging
+import mmap
+
+try:
+    import fitz
+    HAS_FITZ = True
+except ImportError:
+    HAS_FITZ = False
+
+try:
+    import pdfplumber
+    HAS_PDFPLUMBER = True
+except ImportError:
+    HAS_PDFPLUMBER = False
+
+try:
+    from PyPDF2 import PdfReader
+    HAS_PYPDF2 = True
+except ImportError:
+    HAS_PYPDF2 = False
 
 logger = logging.getLogger(__name__)
 
+# PyMuPDF output longer than this is accepted without trying slower backends
+MIN_TEXT_CHARS = 500
 
-def extract_text_from_pdf(pdf_path: Path) -> str:
-    """Try multiple methods to extract text from PDF and return best result."""
-    text = ""
 
-    try:
-        import pdfplumber
-        with pdfplumber.open(pdf_path) as pdf:
-            pages = [p.extract_text() or '' for p in pdf.pages]
-            text_pdfplumber = '\n'.join(pages).strip()
-            if len(text_pdfplumber) > len(text):
-                text = text_pdfplumber
-                logger.debug("Successfully extracted with pdfplumber")
-    except Exception as e:
-        logger.debug(f"pdfplumber extraction failed: {e}")
+def _iter_pdfplumber_pages(pdf) -> Iterator[str]:
+    """Yield page texts, releasing each page's cached layout objects afterwards"""
+    for page in pdf.pages:
+        yield page.extract_text() or ''
+        page.close()
 
+
+def _iter_pypdf2_pages(reader) -> Iterator[str]:
+    """Yield page texts, substituting empty text for pages that fail to parse"""
+    for p in reader.pages:
+        try:
+            yield p.extract_text() or ''
+        except Exception:
+            yield ''
+
+
+def _extract_with_fitz(pdf_path: Path) -> str:
+    doc = fitz.open(str(pdf_path))
     try:
-        import fitz
-        doc = fitz.open(str(pdf_path))
-        pages = [page.get_text() for page in doc]
-        text_fitz = '\n'.join(pages).strip()
-        if len(text_fitz) > len(text):
-            text = text_fitz
-            logger.debug("Successfully extracted with PyMuPDF")
+        return '\n'.join(page.get_text() for page in doc).strip()
+    finally:
         doc.close()
-    except Exception as e:
-        logger.debug(f"PyMuPDF extraction failed: {e}")
 
-    try:
-        from PyPDF2 import PdfReader
-        reader = PdfReader(str(pdf_path))
-        pages = []
-        for p in reader.pages:
-            try:
-                pages.append(p.extract_text() or '')
-            except Exception:
-                pages.append('')
-        text_pypdf2 = '\n'.join(pages).strip()
-        if len(text_pypdf2) > len(text):
-            text = text_pypdf2
-            logger.debug("Successfully extracted with PyPDF2")
-    except Exception as e:
-        logger.debug(f"PyPDF2 extraction failed: {e}")
+
+def _extract_with_pdfplumber(pdf_path: Path) -> str:
+    with pdfplumber.open(pdf_path) as pdf:
+        return '\n'.join(_iter_pdfplumber_pages(pdf)).strip()
+
+
+def _extract_with_pypdf2(pdf_path: Path) -> str:
+    # PdfReader copies a path's whole file into memory; a read-only mmap
+    # lets it seek over the file and leaves paging to the OS cache.
+    with open(pdf_path, 'rb') as f, \
+            mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        reader = PdfReader(mm)
+        return '\n'.join(_iter_pypdf2_pages(reader)).strip()
+
+
+# Fastest backend first; slower ones only run if it comes back short
+_BACKENDS = [
+    ("PyMuPDF", HAS_FITZ, _extract_with_fitz),
+    ("pdfplumber", HAS_PDFPLUMBER, _extract_with_pdfplumber),
+    ("PyPDF2", HAS_PYPDF2, _extract_with_pypdf2),
+]
+
+
+def extract_text_from_pdf(pdf_path: Path) -> str:
+    """Extract text with the fastest available backend, falling back if it yields too little."""
+    text = ""
+
+    for name, available, extract in _BACKENDS:
+        if not available:
+            continue
+        try:
+            candidate = extract(pdf_path)
+        except Exception as e:
+            logger.debug("%s extraction failed: %s", name, e)
+            continue
+
+        if len(candidate) > len(text):
+            text = candidate
+            logger.debug("Successfully extracted with %s", name)
+        if len(text) > MIN_TEXT_CHARS:
+            break
 
     if not text:
         logger.warning(f"Failed to extract text from {pdf_path.name}")
 
-    return text
\ No newline at end of file
+    return text
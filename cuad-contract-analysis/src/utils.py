@@ -1,17 +1,30 @@
 import re
 from pathlib import Path
 
+# Single-character fixes applied in one translate pass
+_TRANS = str.maketrans({
+    '\r': '\n',
+    '\u2018': "'",
+    '\u2019': "'",
+    '\u201c': '"',
+    '\u201d': '"',
+    '\xa0': ' ',
+    '\u2013': '-',
+    '\u2014': '-',
+})
+_PAGE_RE = re.compile(r'Page\s+\d+(?:\s+of\s+\d+)?', re.IGNORECASE)
+_BLANK_LINES_RE = re.compile(r'\n{2,}')
+_SPACES_RE = re.compile(r'[ \t]+')
+
 
 def normalize_text(text: str) -> str:
     """Normalize contract text by cleaning and formatting"""
     if not text:
         return ''
 
-    text = text.replace('\r', '\n')
-    text = re.sub(r'Page\s+\d+\s+of\s+\d+', '', text, flags=re.IGNORECASE)
-    text = re.sub(r'Page\s+\d+', '', text, flags=re.IGNORECASE)
-    text = re.sub(r'\n{2,}', '\n\n', text)
-    text = re.sub(r'[ \t]+', ' ', text)
+    text = _PAGE_RE.sub('', text.translate(_TRANS))
+    text = _BLANK_LINES_RE.sub('\n\n', text)
+    text = _SPACES_RE.sub(' ', text)
 
     return text.strip()
 